@@ -1,4 +1,5 @@
 import multiprocessing
+import os
 
 bind = "0.0.0.0:42110"
 workers = 2
@@ -8,3 +9,19 @@ keep_alive = 60
 accesslog = "-"
 errorlog = "-"
 loglevel = "debug"
+
+
+def on_starting(server):
+    "Migrate database once in the master process instead of in each worker on startup"
+    import django
+    from django.core.management import call_command
+    from django.db import connections
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "khoj.app.settings")
+    django.setup()
+    call_command("migrate", "--noinput")
+
+    # Do not share the master's database connections with forked workers
+    connections.close_all()
+    # Workers inherit the environment of the master, so they skip migrating the database again
+    os.environ["KHOJ_SKIP_MIGRATIONS"] = "true"
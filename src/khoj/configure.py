@@ -1,6 +1,7 @@
 import json
 import logging
 import os
+import threading
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Optional
@@ -78,11 +79,13 @@ class UserAuthenticationBackend(AuthenticationBackend):
         # Request from Web client
         current_user = request.session.get("user")
         if current_user and current_user.get("email"):
-            user = (
-                await self.khojuser_manager.filter(email=current_user.get("email"))
-                .prefetch_related("subscription")
-                .afirst()
-            )
+            email = current_user.get("email")
+            # Reuse recently authenticated user to avoid a DB round-trip on every request
+            user = state.user_cache.get(email)
+            if user is None:
+                user = await self.khojuser_manager.filter(email=email).prefetch_related("subscription").afirst()
+                if user:
+                    state.user_cache[email] = user
             if user:
                 if not state.billing_enabled:
                     return AuthCredentials(["authenticated", "premium"]), AuthenticatedKhojUser(user)
@@ -365,3 +368,26 @@ def upload_telemetry():
 def delete_old_user_requests():
     num_deleted = delete_user_requests()
     logger.debug(f"🗑️ Deleted {num_deleted[0]} day-old user requests")
+
+
+# Scheduled jobs currently running, to not start another run of a job while it is still running
+running_scheduled_jobs: set[schedule.Job] = set()
+
+
+def run_pending_scheduled_jobs(scheduler: schedule.Scheduler = schedule.default_scheduler):
+    # Run each due job in its own thread, so long running jobs like content indexing
+    # do not hold up other jobs like telemetry upload from running on time
+    for job in list(scheduler.jobs):
+        if job.should_run and job not in running_scheduled_jobs:
+            running_scheduled_jobs.add(job)
+            # Use daemon threads to not hold up server shutdown on long running jobs
+            threading.Thread(target=run_scheduled_job, args=(job,), daemon=True).start()
+
+
+def run_scheduled_job(job: schedule.Job):
+    try:
+        job.run()
+    except Exception as e:
+        logger.error(f"🚨 Failed to run scheduled job: {e}", exc_info=True)
+    finally:
+        running_scheduled_jobs.discard(job)
@@ -135,14 +135,16 @@ async def aset_user_phone_number(user: KhojUser, phone_number: str) -> KhojUser:
             raise HTTPException(status_code=400, detail="Phone number already exists")
 
     user.phone_number = phone_number
-    await user.asave()
+    await user.asave(update_fields=["phone_number"])
+    invalidate_cached_user(user)
     return user
 
 
 async def aremove_phone_number(user: KhojUser) -> KhojUser:
     user.phone_number = None
     user.verified_phone_number = False
-    await user.asave()
+    await user.asave(update_fields=["phone_number", "verified_phone_number"])
+    invalidate_cached_user(user)
     return user
 
 
@@ -196,7 +198,8 @@ async def create_user_by_google_token(token: dict) -> KhojUser:
 def set_user_name(user: KhojUser, first_name: str, last_name: str) -> KhojUser:
     user.first_name = first_name
     user.last_name = last_name
-    user.save()
+    user.save(update_fields=["first_name", "last_name"])
+    invalidate_cached_user(user)
     return user
 
 
@@ -223,6 +226,10 @@ def get_user_subscription(email: str) -> Optional[Subscription]:
     return Subscription.objects.filter(user__email=email).first()
 
 
+async def aget_user_subscription(email: str) -> Optional[Subscription]:
+    return await Subscription.objects.filter(user__email=email).afirst()
+
+
 async def set_user_subscription(
     email: str, is_recurring=None, renewal_date=None, type="standard"
 ) -> Optional[Subscription]:
@@ -239,6 +246,7 @@ async def set_user_subscription(
     elif renewal_date is not None:
         user_subscription.renewal_date = renewal_date
     await user_subscription.asave()
+    invalidate_cached_user(user)
     return user_subscription
 
 
@@ -278,6 +286,17 @@ async def aget_user_subscription_state(user: KhojUser) -> str:
     return subscription_to_state(user_subscription)
 
 
+def invalidate_cached_user(user: KhojUser):
+    "Drop user from the authenticated user cache so the next request reloads it from the DB"
+    state.user_cache.pop(user.email, None)
+    invalidate_cached_config_page(user)
+
+
+def invalidate_cached_config_page(user: KhojUser):
+    "Drop user settings cached for the config page so the next visit reloads them from the DB"
+    state.config_page_cache.pop(user.id, None)
+
+
 async def get_user_by_email(email: str) -> KhojUser:
     return await KhojUser.objects.filter(email=email).afirst()
 
@@ -332,11 +351,26 @@ def get_user_github_config(user: KhojUser):
     return config
 
 
+async def aget_user_github_config(user: KhojUser):
+    config = await GithubConfig.objects.filter(user=user).afirst()
+    return config
+
+
+async def aget_github_repos(github_config: GithubConfig) -> List[dict]:
+    "Get name, owner and branch of repositories in the Github config"
+    return await sync_to_async(list)(github_config.githubrepoconfig.values("name", "owner", "branch"))
+
+
 def get_user_notion_config(user: KhojUser):
     config = NotionConfig.objects.filter(user=user).first()
     return config
 
 
+async def aget_user_notion_config(user: KhojUser):
+    config = await NotionConfig.objects.filter(user=user).afirst()
+    return config
+
+
 def delete_user_requests(window: timedelta = timedelta(days=1)):
     return UserRequests.objects.filter(created_at__lte=datetime.now(tz=timezone.utc) - window).delete()
 
@@ -393,6 +427,21 @@ def get_user_search_model_or_default(user=None):
     return SearchModelConfig.objects.first()
 
 
+async def aget_user_search_model_or_default(user=None):
+    if user:
+        user_search_model = await aget_user_search_model(user)
+        if user_search_model:
+            return user_search_model
+
+    default_search_model = await SearchModelConfig.objects.filter(name="default").afirst()
+    if default_search_model:
+        return default_search_model
+    else:
+        await SearchModelConfig.objects.acreate()
+
+    return await SearchModelConfig.objects.afirst()
+
+
 def get_or_create_search_models():
     search_models = SearchModelConfig.objects.all()
     if search_models.count() == 0:
@@ -402,6 +451,15 @@ def get_or_create_search_models():
     return search_models
 
 
+async def aget_or_create_search_models():
+    search_models = await sync_to_async(list)(SearchModelConfig.objects.all())
+    if len(search_models) == 0:
+        await SearchModelConfig.objects.acreate()
+        search_models = await sync_to_async(list)(SearchModelConfig.objects.all())
+
+    return search_models
+
+
 async def aset_user_search_model(user: KhojUser, search_model_config_id: int):
     config = await SearchModelConfig.objects.filter(id=search_model_config_id).afirst()
     if not config:
@@ -777,6 +835,10 @@ class ConversationAdapters:
     def get_conversation_processor_options():
         return ChatModelOptions.objects.all()
 
+    @staticmethod
+    async def aget_conversation_processor_options():
+        return await sync_to_async(list)(ChatModelOptions.objects.all())
+
     @staticmethod
     def set_conversation_processor_config(user: KhojUser, new_config: ChatModelOptions):
         user_conversation_config, _ = UserConversationConfig.objects.get_or_create(user=user)
@@ -883,8 +945,8 @@ class EntryAdapters:
         return await Entry.objects.filter(user=user, file_source=file_source).adelete()
 
     @staticmethod
-    def get_existing_entry_hashes_by_file(user: KhojUser, file_path: str):
-        return Entry.objects.filter(user=user, file_path=file_path).values_list("hashed_value", flat=True)
+    def get_existing_entry_hashes_by_files(user: KhojUser, file_paths: List[str]):
+        return Entry.objects.filter(user=user, file_path__in=file_paths).values_list("file_path", "hashed_value")
 
     @staticmethod
     def delete_entry_by_hash(user: KhojUser, hashed_values: List[str]):
@@ -919,8 +981,8 @@ class EntryAdapters:
 
     @staticmethod
     def get_size_of_indexed_data_in_mb(user: KhojUser):
-        entries = Entry.objects.filter(user=user).iterator()
-        total_size = sum(sys.getsizeof(entry.compiled) for entry in entries)
+        compiled_entries = Entry.objects.filter(user=user).values_list("compiled", flat=True).iterator()
+        total_size = sum(sys.getsizeof(compiled_entry) for compiled_entry in compiled_entries)
         return total_size / 1024 / 1024
 
     @staticmethod
@@ -994,6 +1056,12 @@ class EntryAdapters:
     def get_unique_file_sources(user: KhojUser):
         return Entry.objects.filter(user=user).values_list("file_source", flat=True).distinct().all()
 
+    @staticmethod
+    async def aget_unique_file_sources(user: KhojUser):
+        return await sync_to_async(list)(
+            Entry.objects.filter(user=user).values_list("file_source", flat=True).distinct().all()
+        )
+
 
 class AutomationAdapters:
     @staticmethod
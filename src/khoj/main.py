@@ -3,6 +3,7 @@
 """
 
 from contextlib import redirect_stdout
+import asyncio
 import logging
 import io
 import os
@@ -11,9 +12,7 @@ import sys
 import locale
 
 from rich.logging import RichHandler
-import threading
 import warnings
-from importlib.metadata import version
 
 from khoj.utils.helpers import in_debug_mode, is_env_var_true
 
@@ -28,7 +27,6 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-import schedule
 
 from django.core.asgi import get_asgi_application
 from django.core.management import call_command
@@ -46,11 +44,6 @@ logging.getLogger("uvicorn.error").setLevel(logging.INFO)
 
 logger = logging.getLogger("khoj")
 
-# Initialize Django Database
-db_migrate_output = io.StringIO()
-with redirect_stdout(db_migrate_output):
-    call_command("migrate", "--noinput")
-
 # Initialize Django Static Files
 collectstatic_output = io.StringIO()
 with redirect_stdout(collectstatic_output):
@@ -88,12 +81,16 @@ app.add_middleware(
 locale.setlocale(locale.LC_ALL, "")
 
 # We import these packages after setting up Django so that Django features are accessible to the app.
-from khoj.configure import configure_routes, initialize_server, configure_middleware
+from khoj.configure import configure_routes, initialize_server, configure_middleware, run_pending_scheduled_jobs
 from khoj.utils import state
 from khoj.utils.cli import cli
 from khoj.utils.initialization import initialization
 
 
+# Output of the DB migration run by this process, if any
+db_migrate_output: io.StringIO = None
+
+
 def shutdown_scheduler():
     logger.info("🌑 Shutting down Khoj")
     state.scheduler.shutdown()
@@ -103,6 +100,13 @@ def run(should_start_server=True):
     # Turn Tokenizers Parallelism Off. App does not support it.
     os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
+    # Initialize Django Database once per process, unless it was already migrated before the server workers started
+    global db_migrate_output
+    if db_migrate_output is None and not is_env_var_true("KHOJ_SKIP_MIGRATIONS"):
+        db_migrate_output = io.StringIO()
+        with redirect_stdout(db_migrate_output):
+            call_command("migrate", "--noinput")
+
     # Load config from CLI
     state.cli_args = sys.argv[1:]
     args = cli(state.cli_args)
@@ -115,7 +119,8 @@ def run(should_start_server=True):
         logger.setLevel(logging.DEBUG)
 
     logger.info(f"🚒 Initializing Khoj v{state.khoj_version}")
-    logger.info(f"📦 Initializing DB:\n{db_migrate_output.getvalue().strip()}")
+    if db_migrate_output is not None:
+        logger.info(f"📦 Initializing DB:\n{db_migrate_output.getvalue().strip()}")
     logger.debug(f"🌍 Initializing Web Client:\n{collectstatic_output.getvalue().strip()}")
 
     initialization()
@@ -130,8 +135,10 @@ def run(should_start_server=True):
 
     logger.info("🌘 Starting Khoj")
 
-    # Setup task scheduler
-    poll_task_scheduler()
+    # Setup task scheduler to run on the server event loop
+    if start_task_scheduler not in app.router.on_startup:
+        app.add_event_handler("startup", start_task_scheduler)
+        app.add_event_handler("shutdown", stop_task_scheduler)
 
     # Setup Background Scheduler
     from django_apscheduler.jobstores import DjangoJobStore
@@ -175,7 +182,7 @@ def set_state(args):
     state.host = args.host
     state.port = args.port
     state.anonymous_mode = args.anonymous_mode
-    state.khoj_version = version("khoj-assistant")
+    state.khoj_version = args.version_no
     state.chat_on_gpu = args.chat_on_gpu
 
 
@@ -196,11 +203,25 @@ def start_server(app, host=None, port=None, socket=None):
     logger.info("🌒 Stopping Khoj")
 
 
-def poll_task_scheduler():
-    timer_thread = threading.Timer(60.0, poll_task_scheduler)
-    timer_thread.daemon = True
-    timer_thread.start()
-    schedule.run_pending()
+async def start_task_scheduler():
+    # Start a single task scheduler per server process, even if its startup handler was registered more than once
+    if getattr(app.state, "task_scheduler", None) is not None:
+        return
+    # Keep reference to the polling task to avoid it being garbage collected
+    app.state.task_scheduler = asyncio.create_task(poll_task_scheduler())
+
+
+async def stop_task_scheduler():
+    task_scheduler: asyncio.Task = getattr(app.state, "task_scheduler", None)
+    if task_scheduler is not None:
+        task_scheduler.cancel()
+        app.state.task_scheduler = None
+
+
+async def poll_task_scheduler():
+    while True:
+        run_pending_scheduled_jobs()
+        await asyncio.sleep(60.0)
 
 
 if __name__ == "__main__":
@@ -3,9 +3,9 @@ import logging
 import re
 import uuid
 from abc import ABC, abstractmethod
-from itertools import repeat
 from typing import Any, Callable, List, Set, Tuple
 
+from django.db import transaction
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from tqdm import tqdm
 
@@ -34,7 +34,7 @@ class TextToEntries(ABC):
 
     @staticmethod
     def hash_func(key: str) -> Callable:
-        return lambda entry: hashlib.md5(bytes(getattr(entry, key), encoding="utf-8")).hexdigest()
+        return lambda entry: hashlib.md5(getattr(entry, key).encode("utf-8")).hexdigest()
 
     @staticmethod
     def remove_long_words(text: str, max_word_length: int = 500) -> str:
@@ -63,29 +63,29 @@ class TextToEntries(ABC):
     ) -> List[Entry]:
         "Split entries if compiled entry length exceeds the max tokens supported by the ML model."
         chunked_entries: List[Entry] = []
+        # Split entries into chunks of max_tokens
+        # Use chunking preference order: paragraphs > sentences > words > characters
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=max_tokens,
+            separators=["\n\n", "\n", "!", "?", ".", " ", "\t", ""],
+            keep_separator=True,
+            length_function=lambda chunk: len(TextToEntries.tokenizer(chunk)),
+            chunk_overlap=0,
+        )
         for entry in entries:
             if is_none_or_empty(entry.compiled):
                 continue
 
-            # Split entry into chunks of max_tokens
-            # Use chunking preference order: paragraphs > sentences > words > characters
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=max_tokens,
-                separators=["\n\n", "\n", "!", "?", ".", " ", "\t", ""],
-                keep_separator=True,
-                length_function=lambda chunk: len(TextToEntries.tokenizer(chunk)),
-                chunk_overlap=0,
-            )
             chunked_entry_chunks = text_splitter.split_text(entry.compiled)
             corpus_id = uuid.uuid4()
+            # Snip heading to avoid crossing max_tokens limit
+            # Keep last 100 characters of heading as entry heading more important than filename
+            snipped_heading = TextToEntries.clean_field(entry.heading)[-100:]
 
             # Create heading prefixed entry from each chunk
             for chunk_index, compiled_entry_chunk in enumerate(chunked_entry_chunks):
                 # Prepend heading to all other chunks, the first chunk already has heading from original entry
-                if chunk_index > 0 and entry.heading:
-                    # Snip heading to avoid crossing max_tokens limit
-                    # Keep last 100 characters of heading as entry heading more important than filename
-                    snipped_heading = entry.heading[-100:]
+                if chunk_index > 0 and snipped_heading:
                     # Prepend snipped heading
                     compiled_entry_chunk = f"{snipped_heading}\n{compiled_entry_chunk}"
 
@@ -125,8 +125,8 @@ class TextToEntries(ABC):
             hashes_by_file = dict[str, set[str]]()
             current_entry_hashes = list(map(TextToEntries.hash_func(key), current_entries))
             hash_to_current_entries = dict(zip(current_entry_hashes, current_entries))
-            for entry in tqdm(current_entries, desc="Hashing Entries"):
-                hashes_by_file.setdefault(entry.file, set()).add(TextToEntries.hash_func(key)(entry))
+            for entry, entry_hash in zip(current_entries, current_entry_hashes):
+                hashes_by_file.setdefault(entry.file, set()).add(entry_hash)
 
         num_deleted_entries = 0
         if regenerate:
@@ -134,33 +134,30 @@ class TextToEntries(ABC):
                 logger.debug(f"Deleting all entries for file type {file_type}")
                 num_deleted_entries = EntryAdapters.delete_all_entries_by_type(user, file_type)
 
-        hashes_to_process = set()
         with timer("Identified entries to add to database in", logger):
-            for file in tqdm(hashes_by_file, desc="Identify new entries"):
-                hashes_for_file = hashes_by_file[file]
-                existing_entries = DbEntry.objects.filter(
-                    user=user, hashed_value__in=hashes_for_file, file_type=file_type
-                )
-                existing_entry_hashes = set([entry.hashed_value for entry in existing_entries])
-                hashes_to_process |= hashes_for_file - existing_entry_hashes
+            # Query hashes of all current entries already in the database at once, instead of per file
+            existing_entry_hashes = set(
+                DbEntry.objects.filter(
+                    user=user, hashed_value__in=list(hash_to_current_entries), file_type=file_type
+                ).values_list("hashed_value", flat=True)
+            )
+            hashes_to_process = set(hash_to_current_entries) - existing_entry_hashes
 
-        embeddings = []
-        with timer("Generated embeddings for entries to add to database in", logger):
-            entries_to_process = [hash_to_current_entries[hashed_val] for hashed_val in hashes_to_process]
-            data_to_embed = [getattr(entry, key) for entry in entries_to_process]
+        num_added_entries, num_added_dates = 0, 0
+        with timer("Generated embeddings and added entries, dates to database in", logger):
             model = get_user_search_model_or_default(user)
-            embeddings += self.embeddings_model[model.name].embed_documents(data_to_embed)
-
-        added_entries: list[DbEntry] = []
-        with timer("Added entries to database in", logger):
             num_items = len(hashes_to_process)
-            assert num_items == len(embeddings)
             batch_size = min(200, num_items)
-            entry_batches = zip(hashes_to_process, embeddings)
 
-            for entry_batch in tqdm(batcher(entry_batches, batch_size), desc="Add entries to database"):
+            # Embed entries batch by batch to avoid holding embeddings of the whole corpus in memory
+            for entry_hashes in tqdm(batcher(hashes_to_process, batch_size), desc="Add entries to database"):
+                data_to_embed = [getattr(hash_to_current_entries[entry_hash], key) for entry_hash in entry_hashes]
+                embeddings = self.embeddings_model[model.name].embed_documents(data_to_embed)
+                assert len(entry_hashes) == len(embeddings)
+
                 batch_embeddings_to_create: List[DbEntry] = []
-                for entry_hash, new_entry in entry_batch:
+                batch_dates_in_entries: List[list] = []
+                for entry_hash, new_entry in zip(entry_hashes, embeddings):
                     entry = hash_to_current_entries[entry_hash]
                     batch_embeddings_to_create.append(
                         DbEntry(
@@ -176,32 +173,36 @@ class TextToEntries(ABC):
                             corpus_id=entry.corpus_id,
                         )
                     )
+                    batch_dates_in_entries.append(self.date_filter.extract_dates(entry.compiled))
                 try:
-                    added_entries += DbEntry.objects.bulk_create(batch_embeddings_to_create)
+                    # Add entries and their dates to database together
+                    with transaction.atomic():
+                        added_entries = DbEntry.objects.bulk_create(batch_embeddings_to_create)
+                        dates_to_create = [
+                            EntryDates(date=date, entry=added_entry)
+                            for added_entry, dates_in_entry in zip(added_entries, batch_dates_in_entries)
+                            for date in dates_in_entry
+                            if not is_none_or_empty(date)
+                        ]
+                        added_dates = EntryDates.objects.bulk_create(dates_to_create)
+                    num_added_entries += len(added_entries)
+                    num_added_dates += len(added_dates)
                 except Exception as e:
                     batch_indexing_error = "\n\n".join(
                         f"file: {entry.file_path}\nheading: {entry.heading}\ncompiled: {entry.compiled[:100]}\nraw: {entry.raw[:100]}"
                         for entry in batch_embeddings_to_create
                     )
                     logger.error(f"Error adding entries to database:\n{batch_indexing_error}\n---\n{e}", exc_info=True)
-            logger.debug(f"Added {len(added_entries)} {file_type} entries to database")
-
-        new_dates = []
-        with timer("Indexed dates from added entries in", logger):
-            for added_entry in added_entries:
-                dates_in_entries = zip(self.date_filter.extract_dates(added_entry.compiled), repeat(added_entry))
-                dates_to_create = [
-                    EntryDates(date=date, entry=added_entry)
-                    for date, added_entry in dates_in_entries
-                    if not is_none_or_empty(date)
-                ]
-                new_dates += EntryDates.objects.bulk_create(dates_to_create)
-            logger.debug(f"Indexed {len(new_dates)} dates from added {file_type} entries")
+            logger.debug(f"Added {num_added_entries} {file_type} entries to database")
+            logger.debug(f"Indexed {num_added_dates} dates from added {file_type} entries")
 
         with timer("Deleted entries identified by server from database in", logger):
-            for file in hashes_by_file:
-                existing_entry_hashes = EntryAdapters.get_existing_entry_hashes_by_file(user, file)
-                to_delete_entry_hashes = set(existing_entry_hashes) - hashes_by_file[file]
+            to_delete_entry_hashes = set()
+            existing_entries = EntryAdapters.get_existing_entry_hashes_by_files(user, list(hashes_by_file))
+            for file, existing_entry_hash in existing_entries:
+                if existing_entry_hash not in hashes_by_file[file]:
+                    to_delete_entry_hashes.add(existing_entry_hash)
+            if to_delete_entry_hashes:
                 num_deleted_entries += len(to_delete_entry_hashes)
                 EntryAdapters.delete_entry_by_hash(user, hashed_values=list(to_delete_entry_hashes))
 
@@ -211,7 +212,7 @@ class TextToEntries(ABC):
                     deleted_count = EntryAdapters.delete_entry_by_file(user, file_path)
                     num_deleted_entries += deleted_count
 
-        return len(added_entries), num_deleted_entries
+        return num_added_entries, num_deleted_entries
 
     @staticmethod
     def mark_entries_for_update(
@@ -223,26 +224,38 @@ class TextToEntries(ABC):
     ):
         # Hash all current and previous entries to identify new entries
         with timer("Hash previous, current entries", logger):
-            current_entry_hashes = list(map(TextToEntries.hash_func(key), current_entries))
-            previous_entry_hashes = list(map(TextToEntries.hash_func(key), previous_entries))
+            hash_entry = TextToEntries.hash_func(key)
+            current_entry_hashes = list(map(hash_entry, current_entries))
+            previous_entry_hashes = list(map(hash_entry, previous_entries))
             if deletion_filenames is not None:
                 deletion_entries = [entry for entry in previous_entries if entry.file in deletion_filenames]
-                deletion_entry_hashes = list(map(TextToEntries.hash_func(key), deletion_entries))
+                deletion_entry_hashes = list(map(hash_entry, deletion_entries))
             else:
                 deletion_entry_hashes = []
 
         with timer("Identify, Mark, Combine new, existing entries", logger):
             hash_to_current_entries = dict(zip(current_entry_hashes, current_entries))
             hash_to_previous_entries = dict(zip(previous_entry_hashes, previous_entries))
+            # Map hashes to the position of their first occurrence for constant time lookups
+            current_entry_hash_positions = {
+                entry_hash: index for index, entry_hash in reversed(list(enumerate(current_entry_hashes)))
+            }
+            previous_entry_hash_positions = {
+                entry_hash: index for index, entry_hash in reversed(list(enumerate(previous_entry_hashes)))
+            }
+
+            current_entry_hash_set = frozenset(current_entry_hashes)
+            previous_entry_hash_set = frozenset(previous_entry_hashes)
+            deletion_entry_hash_set = frozenset(deletion_entry_hashes)
 
             # All entries that did not exist in the previous set are to be added
-            new_entry_hashes = set(current_entry_hashes) - set(previous_entry_hashes)
+            new_entry_hashes = current_entry_hash_set - previous_entry_hash_set
             # All entries that exist in both current and previous sets are kept
-            existing_entry_hashes = set(current_entry_hashes) & set(previous_entry_hashes)
+            existing_entry_hashes = current_entry_hash_set & previous_entry_hash_set
             # All entries that exist in the previous set but not in the current set should be preserved
-            remaining_entry_hashes = set(previous_entry_hashes) - set(current_entry_hashes)
+            remaining_entry_hashes = previous_entry_hash_set - current_entry_hash_set
             # All entries that exist in the previous set and also in the deletions set should be removed
-            to_delete_entry_hashes = set(previous_entry_hashes) & set(deletion_entry_hashes)
+            to_delete_entry_hashes = previous_entry_hash_set & deletion_entry_hash_set
 
             preserving_entry_hashes = existing_entry_hashes
 
@@ -250,12 +263,12 @@ class TextToEntries(ABC):
                 preserving_entry_hashes = (
                     (existing_entry_hashes | remaining_entry_hashes)
                     if len(deletion_entry_hashes) == 0
-                    else (set(previous_entry_hashes) - to_delete_entry_hashes)
+                    else (previous_entry_hash_set - to_delete_entry_hashes)
                 )
 
             # load new entries in the order in which they are processed for a stable sort
             new_entries = [
-                (current_entry_hashes.index(entry_hash), hash_to_current_entries[entry_hash])
+                (current_entry_hash_positions[entry_hash], hash_to_current_entries[entry_hash])
                 for entry_hash in new_entry_hashes
             ]
             new_entries_sorted = sorted(new_entries, key=lambda e: e[0])
@@ -264,7 +277,7 @@ class TextToEntries(ABC):
 
             # Set id of existing entries to their previous ids to reuse their existing encoded embeddings
             existing_entries = [
-                (previous_entry_hashes.index(entry_hash), hash_to_previous_entries[entry_hash])
+                (previous_entry_hash_positions[entry_hash], hash_to_previous_entries[entry_hash])
                 for entry_hash in preserving_entry_hashes
             ]
             existing_entries_sorted = sorted(existing_entries, key=lambda e: e[0])
@@ -36,13 +36,15 @@ api_config = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+content_source_to_config = {
+    DbEntry.EntrySource.GITHUB: GithubConfig,
+    DbEntry.EntrySource.NOTION: NotionConfig,
+    DbEntry.EntrySource.COMPUTER: "Computer",
+}
+
+
 def map_config_to_object(content_source: str):
-    if content_source == DbEntry.EntrySource.GITHUB:
-        return GithubConfig
-    if content_source == DbEntry.EntrySource.NOTION:
-        return NotionConfig
-    if content_source == DbEntry.EntrySource.COMPUTER:
-        return "Computer"
+    return content_source_to_config.get(content_source)
 
 
 async def map_config_to_db(config: FullConfig, user: KhojUser):
@@ -118,6 +120,7 @@ async def set_content_config_github_data(
     except Exception as e:
         logger.error(e, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to set Github config")
+    adapters.invalidate_cached_config_page(user)
 
     update_telemetry_state(
         request=request,
@@ -149,6 +152,7 @@ async def set_content_config_notion_data(
     except Exception as e:
         logger.error(e, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to set Github config")
+    adapters.invalidate_cached_config_page(user)
 
     update_telemetry_state(
         request=request,
@@ -184,6 +188,7 @@ async def remove_content_source_data(
     elif content_object != "Computer":
         await content_object.objects.filter(user=user).adelete()
     await sync_to_async(EntryAdapters.delete_all_entries)(user, content_source)
+    adapters.invalidate_cached_config_page(user)
 
     enabled_content = await sync_to_async(EntryAdapters.get_unique_file_types)(user)
     return {"status": "ok"}
@@ -206,6 +211,7 @@ async def remove_file_data(
     )
 
     await EntryAdapters.adelete_entry_by_file(user, filename)
+    adapters.invalidate_cached_config_page(user)
 
     return {"status": "ok"}
 
@@ -243,6 +249,7 @@ async def update_chat_model(
         raise HTTPException(status_code=403, detail="User is not subscribed to premium")
 
     new_config = await ConversationAdapters.aset_user_conversation_processor(user, int(id))
+    adapters.invalidate_cached_config_page(user)
 
     update_telemetry_state(
         request=request,
@@ -276,6 +283,7 @@ async def update_search_model(
     if not prev_config:
         # If the use was just using the default config, delete all the entries and set the new config.
         await EntryAdapters.adelete_all_entries(user)
+    adapters.invalidate_cached_config_page(user)
 
     if new_config is None:
         return {"status": "error", "message": "Model not found"}
@@ -311,6 +319,8 @@ def set_user_name(
     client: Optional[str] = None,
 ):
     user = request.user.object
+    # Reload user, as the authenticated user may be cached from before an update by another server worker
+    user.refresh_from_db()
 
     split_name = name.split(" ")
 
@@ -24,6 +24,8 @@ async def update_phone_number(
     ),
 ):
     user = request.user.object
+    # Reload user, as the authenticated user may be cached from before an update by another server worker
+    await user.arefresh_from_db()
 
     await adapters.aset_user_phone_number(user, phone_number)
     create_otp(user)
@@ -46,6 +48,7 @@ async def delete_phone_number(
     client: Optional[str] = None,
 ):
     user = request.user.object
+    await user.arefresh_from_db()
 
     await adapters.aremove_phone_number(user)
 
@@ -70,6 +73,8 @@ async def verify_mobile_otp(
     ),
 ):
     user: KhojUser = request.user.object
+    # Reload user to verify the phone number last set by the user, even if it was set via another server worker
+    await user.arefresh_from_db()
 
     update_telemetry_state(
         request=request,
@@ -82,5 +87,6 @@ async def verify_mobile_otp(
         raise HTTPException(status_code=400, detail="Invalid OTP")
 
     user.verified_phone_number = True
-    await user.asave()
+    await user.asave(update_fields=["verified_phone_number"])
+    adapters.invalidate_cached_user(user)
     return {"status": "ok"}
@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, Header, Request, Response, UploadFile
 from pydantic import BaseModel
 from starlette.authentication import requires
 
+from khoj.database.adapters import invalidate_cached_config_page
 from khoj.database.models import GithubConfig, KhojUser, NotionConfig
 from khoj.processor.content.github.github_to_entries import GithubToEntries
 from khoj.processor.content.markdown.markdown_to_entries import MarkdownToEntries
@@ -115,6 +116,7 @@ async def update(
         )
         if not success:
             raise RuntimeError("Failed to update content index")
+        invalidate_cached_config_page(user)
         logger.info(f"Finished processing batch indexing request")
     except Exception as e:
         logger.error(f"Failed to process batch indexing request: {e}", exc_info=True)
@@ -1,11 +1,13 @@
 # System Packages
-import json
+import logging
 import os
 from datetime import timedelta
+from typing import Optional
 
 from fastapi import APIRouter, Request
 from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 from starlette.authentication import has_required_scope, requires
 
 from khoj.database import adapters
@@ -14,24 +16,44 @@ from khoj.database.adapters import (
     ConversationAdapters,
     EntryAdapters,
     PublicConversationAdapters,
-    get_user_github_config,
-    get_user_name,
-    get_user_notion_config,
-    get_user_subscription_state,
+    aget_github_repos,
+    aget_user_github_config,
+    aget_user_name,
+    aget_user_notion_config,
+    subscription_to_state,
 )
 from khoj.database.models import KhojUser
 from khoj.routers.notion import get_notion_auth_url
 from khoj.routers.twilio import is_twilio_enabled
 from khoj.utils import constants, state
+from khoj.utils.helpers import in_debug_mode, resolve_absolute_path
 from khoj.utils.rawconfig import (
     GithubContentConfig,
     GithubRepoConfig,
     NotionContentConfig,
 )
 
+logger = logging.getLogger(__name__)
+
+
+def get_templates_bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    "Cache compiled templates in the Khoj app directory. Skip caching if it is not writable, e.g on read-only disks"
+    app_directory = state.config_file.parent if state.config_file else resolve_absolute_path("~/.khoj")
+    try:
+        cache_directory = app_directory / "cache" / "templates"
+        cache_directory.mkdir(parents=True, exist_ok=True)
+        return FileSystemBytecodeCache(str(cache_directory))
+    except (OSError, RuntimeError) as e:
+        logger.warning(f"Not caching compiled web templates. Failed to create cache directory: {e}")
+        return None
+
+
 # Initialize Router
 web_client = APIRouter()
 templates = Jinja2Templates(directory=constants.web_directory)
+# Reuse compiled templates across server workers, restarts. Only check templates for changes in debug mode
+templates.env.bytecode_cache = get_templates_bytecode_cache()
+templates.env.auto_reload = in_debug_mode()
 
 
 # Create Routes
@@ -212,98 +234,99 @@ def agent_page(request: Request, agent_slug: str):
     )
 
 
-@web_client.get("/config", response_class=HTMLResponse)
-@requires(["authenticated"], redirect="login_page")
-def config_page(request: Request):
-    user: KhojUser = request.user.object
-    user_picture = request.session.get("user", {}).get("picture")
-    has_documents = EntryAdapters.user_has_entries(user=user)
+async def _get_user_config(user: KhojUser) -> dict:
+    "Get the user settings shown on the config page from the DB"
+    has_documents = await EntryAdapters.auser_has_entries(user=user)
 
-    user_subscription_state = get_user_subscription_state(user.email)
-    user_subscription = adapters.get_user_subscription(user.email)
+    user_subscription = await adapters.aget_user_subscription(user.email)
+    user_subscription_state = subscription_to_state(user_subscription)
     subscription_renewal_date = (
         user_subscription.renewal_date.strftime("%d %b %Y")
         if user_subscription and user_subscription.renewal_date
         else (user_subscription.created_at + timedelta(days=7)).strftime("%d %b %Y")
     )
-    given_name = get_user_name(user)
+    given_name = await aget_user_name(user)
 
-    enabled_content_source = set(EntryAdapters.get_unique_file_sources(user))
+    enabled_content_source = set(await EntryAdapters.aget_unique_file_sources(user))
     successfully_configured = {
         "computer": ("computer" in enabled_content_source),
         "github": ("github" in enabled_content_source),
         "notion": ("notion" in enabled_content_source),
     }
 
-    selected_conversation_config = ConversationAdapters.get_conversation_config(user)
-    conversation_options = ConversationAdapters.get_conversation_processor_options().all()
+    selected_conversation_config = await ConversationAdapters.aget_conversation_config(user)
+    conversation_options = await ConversationAdapters.aget_conversation_processor_options()
     all_conversation_options = list()
     for conversation_option in conversation_options:
         all_conversation_options.append({"chat_model": conversation_option.chat_model, "id": conversation_option.id})
 
-    search_model_options = adapters.get_or_create_search_models().all()
+    search_model_options = await adapters.aget_or_create_search_models()
     all_search_model_options = list()
     for search_model_option in search_model_options:
         all_search_model_options.append({"name": search_model_option.name, "id": search_model_option.id})
 
-    current_search_model_option = adapters.get_user_search_model_or_default(user)
+    current_search_model_option = await adapters.aget_user_search_model_or_default(user)
+
+    return {
+        "current_model_state": successfully_configured,
+        "given_name": given_name,
+        "conversation_options": all_conversation_options,
+        "search_model_options": all_search_model_options,
+        "selected_search_model_config": current_search_model_option.id,
+        "selected_conversation_config": selected_conversation_config.id if selected_conversation_config else None,
+        "subscription_state": user_subscription_state,
+        "subscription_renewal_date": subscription_renewal_date,
+        "has_documents": has_documents,
+    }
 
-    notion_oauth_url = get_notion_auth_url(user)
+
+@web_client.get("/config", response_class=HTMLResponse)
+@requires(["authenticated"], redirect="login_page")
+async def config_page(request: Request):
+    user: KhojUser = request.user.object
+    user_picture = request.session.get("user", {}).get("picture")
+    user_config = state.config_page_cache.get(user.id)
+    if user_config is None:
+        user_config = await _get_user_config(user)
+        state.config_page_cache[user.id] = user_config
 
     return templates.TemplateResponse(
         "config.html",
         context={
             "request": request,
-            "current_model_state": successfully_configured,
             "anonymous_mode": state.anonymous_mode,
             "username": user.username,
-            "given_name": given_name,
-            "conversation_options": all_conversation_options,
-            "search_model_options": all_search_model_options,
-            "selected_search_model_config": current_search_model_option.id,
-            "selected_conversation_config": selected_conversation_config.id if selected_conversation_config else None,
             "user_photo": user_picture,
             "billing_enabled": state.billing_enabled,
-            "subscription_state": user_subscription_state,
-            "subscription_renewal_date": subscription_renewal_date,
             "khoj_cloud_subscription_url": os.getenv("KHOJ_CLOUD_SUBSCRIPTION_URL"),
             "is_active": has_required_scope(request, ["premium"]),
-            "has_documents": has_documents,
             "is_twilio_enabled": is_twilio_enabled(),
             "phone_number": user.phone_number,
             "is_phone_number_verified": user.verified_phone_number,
             "khoj_version": state.khoj_version,
-            "notion_oauth_url": notion_oauth_url,
+            "notion_oauth_url": get_notion_auth_url(user),
+            **user_config,
         },
     )
 
 
 @web_client.get("/config/content-source/github", response_class=HTMLResponse)
 @requires(["authenticated"], redirect="login_page")
-def github_config_page(request: Request):
+async def github_config_page(request: Request):
     user = request.user.object
     user_picture = request.session.get("user", {}).get("picture")
-    has_documents = EntryAdapters.user_has_entries(user=user)
-    current_github_config = get_user_github_config(user)
+    has_documents = await EntryAdapters.auser_has_entries(user=user)
+    current_github_config = await aget_user_github_config(user)
 
     if current_github_config:
-        raw_repos = current_github_config.githubrepoconfig.all()
-        repos = []
-        for repo in raw_repos:
-            repos.append(
-                GithubRepoConfig(
-                    name=repo.name,
-                    owner=repo.owner,
-                    branch=repo.branch,
-                )
-            )
+        raw_repos = await aget_github_repos(current_github_config)
+        repos = [GithubRepoConfig(**repo) for repo in raw_repos]
         current_config = GithubContentConfig(
             pat_token=current_github_config.pat_token,
             repos=repos,
-        )
-        current_config = json.loads(current_config.json())
+        ).model_dump(mode="json")
     else:
-        current_config = {}  # type: ignore
+        current_config = {}
 
     return templates.TemplateResponse(
         "content_source_github_input.html",
@@ -321,17 +344,15 @@ def github_config_page(request: Request):
 
 @web_client.get("/config/content-source/notion", response_class=HTMLResponse)
 @requires(["authenticated"], redirect="login_page")
-def notion_config_page(request: Request):
+async def notion_config_page(request: Request):
     user = request.user.object
     user_picture = request.session.get("user", {}).get("picture")
-    has_documents = EntryAdapters.user_has_entries(user=user)
-    current_notion_config = get_user_notion_config(user)
+    has_documents = await EntryAdapters.auser_has_entries(user=user)
+    current_notion_config = await aget_user_notion_config(user)
 
     current_config = NotionContentConfig(
         token=current_notion_config.token if current_notion_config else "",
-    )
-
-    current_config = json.loads(current_config.model_dump_json())
+    ).model_dump(mode="json")
 
     return templates.TemplateResponse(
         "content_source_notion_input.html",
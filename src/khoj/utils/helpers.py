@@ -13,7 +13,7 @@ from importlib.metadata import version
 from itertools import islice
 from os import path
 from pathlib import Path
-from time import perf_counter
+from time import monotonic, perf_counter
 from typing import TYPE_CHECKING, Optional, Union
 from urllib.parse import urlparse
 
@@ -192,6 +192,37 @@ class LRU(OrderedDict):
             del self[oldest]
 
 
+class TTLCache(LRU):
+    "LRU cache with entries that expire ttl seconds after they were set"
+
+    def __init__(self, *args, capacity=128, ttl: float = 60, **kwargs):
+        self.ttl = ttl
+        super().__init__(*args, capacity=capacity, **kwargs)
+
+    def __getitem__(self, key):
+        value, expires_at = super().__getitem__(key)
+        if expires_at <= monotonic():
+            del self[key]
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, (value, monotonic() + self.ttl))
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
 def get_server_id():
     """Get, Generate Persistent, Random ID per server install.
     Helps count distinct khoj servers deployed.
@@ -381,7 +412,7 @@ def batcher(iterable, max_n):
         chunk = list(islice(it, max_n))
         if not chunk:
             return
-        yield (x for x in chunk if x is not None)
+        yield chunk
 
 
 def is_env_var_true(env_var: str, default: str = "false") -> bool:
@@ -11,7 +11,7 @@ from whisper import Whisper
 from khoj.processor.embeddings import CrossEncoderModel, EmbeddingsModel
 from khoj.utils import config as utils_config
 from khoj.utils.config import OfflineChatProcessorModel, SearchModels
-from khoj.utils.helpers import LRU, get_device
+from khoj.utils.helpers import LRU, TTLCache, get_device
 from khoj.utils.rawconfig import FullConfig
 
 # Application Global State
@@ -28,6 +28,8 @@ host: str = None
 port: int = None
 cli_args: List[str] = None
 query_cache: Dict[str, LRU] = defaultdict(LRU)
+user_cache: TTLCache = TTLCache(capacity=4096, ttl=30)
+config_page_cache: TTLCache = TTLCache(capacity=1024, ttl=15)
 chat_lock = threading.Lock()
 SearchType = utils_config.SearchType
 scheduler: BackgroundScheduler = None
@@ -1,7 +1,9 @@
 import os
 from pathlib import Path
 
+import httpx
 import pytest
+from django.conf import settings
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.testclient import TestClient
@@ -46,6 +48,31 @@ def enable_db_access_for_all_tests(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def restore_app_state():
+    "Restore app state changed by a test, so it does not leak into the next test"
+    config = state.config.model_copy() if state.config else None
+    search_type = state.SearchType
+    anonymous_mode = state.anonymous_mode
+    billing_enabled = state.billing_enabled
+
+    yield
+
+    state.config = config
+    state.SearchType = search_type
+    state.anonymous_mode = anonymous_mode
+    state.billing_enabled = billing_enabled
+    # Users cached by a test may no longer exist in the test DB
+    state.user_cache.clear()
+    state.config_page_cache.clear()
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    # Do not wait for test DB writes to be flushed to disk on commit
+    settings.DATABASES["default"].setdefault("OPTIONS", {})["options"] = "-c synchronous_commit=off"
+
+
 @pytest.fixture(scope="session")
 def search_config() -> SearchConfig:
     state.embeddings_model = dict()
@@ -314,15 +341,6 @@ def chat_client_builder(search_config, user, index_content=True, require_auth=Fa
     return TestClient(app)
 
 
-@pytest.fixture(scope="function")
-def fastapi_app():
-    app = FastAPI()
-    configure_routes(app)
-    configure_middleware(app)
-    app.mount("/static", StaticFiles(directory=web_directory), name="static")
-    return app
-
-
 @pytest.fixture(scope="function")
 def client(
     content_config: ContentConfig,
@@ -360,6 +378,24 @@ def client(
     return TestClient(app)
 
 
+@pytest.fixture(scope="function")
+async def async_client(client: TestClient):
+    "Client to make concurrent requests to the same app as the client fixture. Use from anyio tests"
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=client.app), base_url="http://testserver") as ac:
+        yield ac
+
+
+@pytest.fixture(scope="function")
+def anonymous_client(monkeypatch):
+    monkeypatch.setattr(state, "anonymous_mode", True)
+
+    app = FastAPI()
+    configure_routes(app)
+    configure_middleware(app)
+    app.mount("/static", StaticFiles(directory=web_directory), name="static")
+    return TestClient(app)
+
+
 @pytest.fixture(scope="function")
 def client_offline_chat(search_config: SearchConfig, default_user2: KhojUser):
     # Initialize app state
@@ -415,7 +451,7 @@ def org_config_with_only_new_file(new_org_file: Path, default_user: KhojUser):
     return LocalOrgConfig.objects.filter(user=default_user).first()
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def sample_org_data():
     return get_sample_data("org")
 
@@ -0,0 +1,126 @@
+import pytest
+from asgiref.sync import sync_to_async
+from starlette.authentication import AuthCredentials
+from starlette.requests import HTTPConnection, Request
+
+from khoj.configure import AuthenticatedKhojUser, UserAuthenticationBackend
+from khoj.database.adapters import (
+    aset_user_phone_number,
+    set_user_name,
+    set_user_subscription,
+)
+from khoj.database.models import KhojUser
+from khoj.routers import api_phone
+from khoj.utils import state
+
+
+@pytest.fixture
+def auth_backend():
+    return UserAuthenticationBackend()
+
+
+def web_client_request(email: str) -> HTTPConnection:
+    "Request with user session set, as made by a logged in user from the web client"
+    return HTTPConnection({"type": "http", "session": {"user": {"email": email}}, "headers": [], "query_string": b""})
+
+
+# ----------------------------------------------------------------------------------------------------
+@pytest.mark.anyio
+@pytest.mark.django_db(transaction=True)
+async def test_session_user_reused_from_cache(auth_backend: UserAuthenticationBackend, default_user: KhojUser):
+    # Arrange
+    _, first_user = await auth_backend.authenticate(web_client_request(default_user.email))
+    # Any further DB lookup of the user would fail
+    auth_backend.khojuser_manager = None
+
+    # Act
+    credentials, user = await auth_backend.authenticate(web_client_request(default_user.email))
+
+    # Assert
+    assert "authenticated" in credentials.scopes
+    assert user.object.id == default_user.id
+    assert user.object is first_user.object
+
+
+# ----------------------------------------------------------------------------------------------------
+@pytest.mark.anyio
+@pytest.mark.django_db(transaction=True)
+async def test_set_user_name_evicts_cached_user(auth_backend: UserAuthenticationBackend, default_user: KhojUser):
+    # Arrange
+    await auth_backend.authenticate(web_client_request(default_user.email))
+    assert default_user.email in state.user_cache
+
+    # Act
+    await sync_to_async(set_user_name)(default_user, "Ada", "Lovelace")
+    _, user = await auth_backend.authenticate(web_client_request(default_user.email))
+
+    # Assert
+    assert user.object.first_name == "Ada"
+
+
+# ----------------------------------------------------------------------------------------------------
+@pytest.mark.anyio
+@pytest.mark.django_db(transaction=True)
+async def test_set_user_phone_number_evicts_cached_user(
+    auth_backend: UserAuthenticationBackend, default_user: KhojUser
+):
+    # Arrange
+    await auth_backend.authenticate(web_client_request(default_user.email))
+    assert default_user.email in state.user_cache
+
+    # Act
+    await aset_user_phone_number(default_user, "+14155552671")
+    _, user = await auth_backend.authenticate(web_client_request(default_user.email))
+
+    # Assert
+    assert str(user.object.phone_number) == "+14155552671"
+
+
+# ----------------------------------------------------------------------------------------------------
+@pytest.mark.anyio
+@pytest.mark.django_db(transaction=True)
+async def test_set_user_subscription_evicts_cached_user(
+    auth_backend: UserAuthenticationBackend, default_user: KhojUser
+):
+    # Arrange
+    await auth_backend.authenticate(web_client_request(default_user.email))
+    assert default_user.email in state.user_cache
+
+    # Act
+    await set_user_subscription(default_user.email, is_recurring=True)
+
+    # Assert
+    assert default_user.email not in state.user_cache
+    _, user = await auth_backend.authenticate(web_client_request(default_user.email))
+    assert user.object.subscription.is_recurring
+
+
+# ----------------------------------------------------------------------------------------------------
+@pytest.mark.anyio
+@pytest.mark.django_db(transaction=True)
+async def test_verify_phone_number_with_user_cached_before_update(default_user: KhojUser, monkeypatch):
+    # Arrange
+    # User authenticated and cached by a server worker before their phone number was set via another worker
+    cached_user = await KhojUser.objects.aget(id=default_user.id)
+    await aset_user_phone_number(default_user, "+14155552671")
+    request = Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "headers": [],
+            "query_string": b"",
+            "user": AuthenticatedKhojUser(cached_user),
+            "auth": AuthCredentials(["authenticated"]),
+        }
+    )
+    monkeypatch.setattr(api_phone, "update_telemetry_state", lambda **kwargs: None)
+    monkeypatch.setattr(api_phone, "verify_otp", lambda user, code: str(user.phone_number) == "+14155552671")
+
+    # Act
+    response = await api_phone.verify_mobile_otp(request=request, code="123456", rate_limiter_per_day=None)
+
+    # Assert
+    assert response == {"status": "ok"}
+    user = await KhojUser.objects.aget(id=default_user.id)
+    assert user.verified_phone_number
+    assert str(user.phone_number) == "+14155552671"
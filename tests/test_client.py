@@ -1,121 +1,134 @@
 # Standard Modules
+import asyncio
 import os
-from urllib.parse import quote
+from functools import lru_cache
+from typing import Tuple
 
+import httpx
 import pytest
-from fastapi import FastAPI
-from fastapi.testclient import TestClient
-from PIL import Image
 
-from khoj.configure import configure_routes, configure_search_types
 from khoj.database.adapters import EntryAdapters
 from khoj.database.models import KhojApiUser, KhojUser
 from khoj.processor.content.org_mode.org_to_entries import OrgToEntries
 from khoj.search_type import text_search
 from khoj.utils import state
-from khoj.utils.rawconfig import ContentConfig, SearchConfig
+from khoj.utils.rawconfig import SearchConfig
+from tests.helpers import (
+    ChatModelOptionsFactory,
+    UserConversationProcessorConfigFactory,
+)
+
+AUTH_HEADERS = {"Authorization": "Bearer kk-secret"}
+SEARCH_URL = "/api/search"
 
 
 # Test
 # ----------------------------------------------------------------------------------------------------
-@pytest.mark.django_db(transaction=True)
+@pytest.mark.django_db
 def test_search_with_no_auth_key(client):
     # Arrange
-    user_query = quote("How to call Khoj from Emacs?")
+    user_query = "How to call Khoj from Emacs?"
 
     # Act
-    response = client.get(f"/api/search?q={user_query}")
+    response = client.get(SEARCH_URL, params={"q": user_query})
 
     # Assert
     assert response.status_code == 403
 
 
-@pytest.mark.django_db(transaction=True)
+@pytest.mark.django_db
 def test_search_with_invalid_auth_key(client):
     # Arrange
     headers = {"Authorization": "Bearer invalid-token"}
-    user_query = quote("How to call Khoj from Emacs?")
+    user_query = "How to call Khoj from Emacs?"
 
     # Act
-    response = client.get(f"/api/search?q={user_query}", headers=headers)
+    response = client.get(SEARCH_URL, params={"q": user_query}, headers=headers)
 
     # Assert
     assert response.status_code == 403
 
 
 # ----------------------------------------------------------------------------------------------------
-@pytest.mark.django_db(transaction=True)
+@pytest.mark.django_db
 def test_search_with_invalid_content_type(client):
     # Arrange
-    headers = {"Authorization": "Bearer kk-secret"}
-    user_query = quote("How to call Khoj from Emacs?")
+    user_query = "How to call Khoj from Emacs?"
 
     # Act
-    response = client.get(f"/api/search?q={user_query}&t=invalid_content_type", headers=headers)
+    # Invalid content type is rejected by query param validation, before the request is authenticated
+    response = client.get(SEARCH_URL, params={"q": user_query, "t": "invalid_content_type"})
 
     # Assert
     assert response.status_code == 422
 
 
 # ----------------------------------------------------------------------------------------------------
+@pytest.mark.anyio
 @pytest.mark.django_db(transaction=True)
-def test_search_with_valid_content_type(client):
-    headers = {"Authorization": "Bearer kk-secret"}
-    for content_type in ["all", "org", "markdown", "image", "pdf", "github", "notion", "plaintext"]:
-        # Act
-        response = client.get(f"/api/search?q=random&t={content_type}", headers=headers)
-        # Assert
-        assert response.status_code == 200, f"Returned status: {response.status_code} for content type: {content_type}"
+async def test_search_with_valid_content_type(async_client):
+    # Arrange
+    content_types = ["all", "org", "markdown", "image", "pdf", "github", "notion", "plaintext"]
+
+    # Act
+    responses = await asyncio.gather(
+        *[
+            async_client.get(SEARCH_URL, params={"q": "random", "t": content_type}, headers=AUTH_HEADERS)
+            for content_type in content_types
+        ]
+    )
+
+    # Assert
+    failed = {
+        ctype: response.status_code for ctype, response in zip(content_types, responses) if response.status_code != 200
+    }
+    assert failed == {}, f"Returned non 200 status for content types: {failed}"
 
 
 # ----------------------------------------------------------------------------------------------------
-@pytest.mark.django_db(transaction=True)
+@pytest.mark.django_db
 def test_index_update_with_no_auth_key(client):
     # Arrange
-    files = get_sample_files_data()
+    files, files_content_type = get_sample_files_multipart()
 
     # Act
-    response = client.post("/api/v1/index/update", files=files)
+    response = client.post("/api/v1/index/update", content=files, headers={"Content-Type": files_content_type})
 
     # Assert
     assert response.status_code == 403
 
 
 # ----------------------------------------------------------------------------------------------------
-@pytest.mark.django_db(transaction=True)
+@pytest.mark.django_db
 def test_index_update_with_invalid_auth_key(client):
     # Arrange
-    files = get_sample_files_data()
-    headers = {"Authorization": "Bearer kk-invalid-token"}
+    files, files_content_type = get_sample_files_multipart()
+    headers = {"Authorization": "Bearer kk-invalid-token", "Content-Type": files_content_type}
 
     # Act
-    response = client.post("/api/v1/index/update", files=files, headers=headers)
+    response = client.post("/api/v1/index/update", content=files, headers=headers)
 
     # Assert
     assert response.status_code == 403
 
 
 # ----------------------------------------------------------------------------------------------------
-@pytest.mark.django_db(transaction=True)
+@pytest.mark.django_db
 def test_update_with_invalid_content_type(client):
-    # Arrange
-    headers = {"Authorization": "Bearer kk-secret"}
-
     # Act
-    response = client.get(f"/api/update?t=invalid_content_type", headers=headers)
+    # Invalid content type is rejected by query param validation, before the request is authenticated
+    response = client.get(f"/api/update?t=invalid_content_type")
 
     # Assert
     assert response.status_code == 422
 
 
 # ----------------------------------------------------------------------------------------------------
-@pytest.mark.django_db(transaction=True)
+@pytest.mark.django_db
 def test_regenerate_with_invalid_content_type(client):
-    # Arrange
-    headers = {"Authorization": "Bearer kk-secret"}
-
     # Act
-    response = client.get(f"/api/update?force=true&t=invalid_content_type", headers=headers)
+    # Invalid content type is rejected by query param validation, before the request is authenticated
+    response = client.get(f"/api/update?force=true&t=invalid_content_type")
 
     # Assert
     assert response.status_code == 422
@@ -127,10 +140,9 @@ def test_index_update_big_files(client):
     # Arrange
     state.billing_enabled = True
     files = get_big_size_sample_files_data()
-    headers = {"Authorization": "Bearer kk-secret"}
 
     # Act
-    response = client.post("/api/v1/index/update", files=files, headers=headers)
+    response = client.post("/api/v1/index/update", files=files, headers=AUTH_HEADERS)
 
     # Assert
     assert response.status_code == 429
@@ -158,11 +170,11 @@ def test_index_update_normal_file_unsubscribed(client, api_user4: KhojApiUser):
     # Arrange
     api_token = api_user4.token
     state.billing_enabled = True
-    files = get_sample_files_data()
-    headers = {"Authorization": f"Bearer {api_token}"}
+    files, files_content_type = get_sample_files_multipart()
+    headers = {"Authorization": f"Bearer {api_token}", "Content-Type": files_content_type}
 
     # Act
-    response = client.post("/api/v1/index/update", files=files, headers=headers)
+    response = client.post("/api/v1/index/update", content=files, headers=headers)
 
     # Assert
     assert response.status_code == 200
@@ -174,10 +186,9 @@ def test_index_update_big_files_no_billing(client):
     # Arrange
     state.billing_enabled = False
     files = get_big_size_sample_files_data()
-    headers = {"Authorization": "Bearer kk-secret"}
 
     # Act
-    response = client.post("/api/v1/index/update", files=files, headers=headers)
+    response = client.post("/api/v1/index/update", files=files, headers=AUTH_HEADERS)
 
     # Assert
     assert response.status_code == 200
@@ -187,11 +198,12 @@ def test_index_update_big_files_no_billing(client):
 @pytest.mark.django_db(transaction=True)
 def test_index_update(client):
     # Arrange
-    files = get_sample_files_data()
-    headers = {"Authorization": "Bearer kk-secret"}
+    files, files_content_type = get_sample_files_multipart()
 
     # Act
-    response = client.post("/api/v1/index/update", files=files, headers=headers)
+    response = client.post(
+        "/api/v1/index/update", content=files, headers={**AUTH_HEADERS, "Content-Type": files_content_type}
+    )
 
     # Assert
     assert response.status_code == 200
@@ -220,30 +232,32 @@ def test_index_update_fails_if_more_than_1000_files(client, api_user4: KhojApiUs
 # ----------------------------------------------------------------------------------------------------
 @pytest.mark.django_db(transaction=True)
 def test_regenerate_with_valid_content_type(client):
-    for content_type in ["all", "org", "markdown", "image", "pdf", "notion"]:
-        # Arrange
-        files = get_sample_files_data()
-        headers = {"Authorization": "Bearer kk-secret"}
+    # Arrange
+    files, files_content_type = get_sample_files_multipart()
+    headers = {**AUTH_HEADERS, "Content-Type": files_content_type}
+    content_types = ["all", "org", "markdown", "image", "pdf", "notion"]
 
-        # Act
-        response = client.post(f"/api/v1/index/update?t={content_type}", files=files, headers=headers)
+    # Act
+    responses = {
+        content_type: client.post(f"/api/v1/index/update?t={content_type}", content=files, headers=headers)
+        for content_type in content_types
+    }
 
-        # Assert
-        assert response.status_code == 200, f"Returned status: {response.status_code} for content type: {content_type}"
+    # Assert
+    failed = {ctype: response.status_code for ctype, response in responses.items() if response.status_code != 200}
+    assert failed == {}, f"Returned non 200 status for content types: {failed}"
 
 
 # ----------------------------------------------------------------------------------------------------
 @pytest.mark.django_db(transaction=True)
 def test_regenerate_with_github_fails_without_pat(client):
-    # Act
-    headers = {"Authorization": "Bearer kk-secret"}
-    response = client.get(f"/api/update?force=true&t=github", headers=headers)
-
     # Arrange
-    files = get_sample_files_data()
+    files, files_content_type = get_sample_files_multipart()
 
     # Act
-    response = client.post(f"/api/v1/index/update?t=github", files=files, headers=headers)
+    response = client.post(
+        f"/api/v1/index/update?t=github", content=files, headers={**AUTH_HEADERS, "Content-Type": files_content_type}
+    )
 
     # Assert
     assert response.status_code == 200, f"Returned status: {response.status_code} for content type: github"
@@ -263,13 +277,9 @@ def test_get_configured_types_via_api(client, sample_org_data):
 
 # ----------------------------------------------------------------------------------------------------
 @pytest.mark.django_db(transaction=True)
-def test_get_api_config_types(client, sample_org_data, default_user: KhojUser):
-    # Arrange
-    headers = {"Authorization": "Bearer kk-secret"}
-    text_search.setup(OrgToEntries, sample_org_data, regenerate=False, user=default_user)
-
+def test_get_api_config_types(client):
     # Act
-    response = client.get(f"/api/config/types", headers=headers)
+    response = client.get(f"/api/config/types", headers=AUTH_HEADERS)
 
     # Assert
     assert response.status_code == 200
@@ -278,18 +288,13 @@ def test_get_api_config_types(client, sample_org_data, default_user: KhojUser):
 
 # ----------------------------------------------------------------------------------------------------
 @pytest.mark.django_db(transaction=True)
-def test_get_configured_types_with_no_content_config(fastapi_app: FastAPI):
+def test_get_configured_types_with_no_content_config(anonymous_client):
     # Arrange
-    state.anonymous_mode = True
     if state.config and state.config.content_type:
         state.config.content_type = None
-    state.search_models = configure_search_types()
-
-    configure_routes(fastapi_app)
-    client = TestClient(fastapi_app)
 
     # Act
-    response = client.get(f"/api/config/types")
+    response = anonymous_client.get(f"/api/config/types")
 
     # Assert
     assert response.status_code == 200
@@ -298,117 +303,99 @@ def test_get_configured_types_with_no_content_config(fastapi_app: FastAPI):
 
 # ----------------------------------------------------------------------------------------------------
 @pytest.mark.django_db(transaction=True)
-def test_notes_search(client, search_config: SearchConfig, sample_org_data, default_user: KhojUser):
+def test_config_page_shows_updated_chat_model(client, default_user: KhojUser):
     # Arrange
-    headers = {"Authorization": "Bearer kk-secret"}
-    text_search.setup(OrgToEntries, sample_org_data, regenerate=False, user=default_user)
-    user_query = quote("How to git install application?")
+    old_chat_model = ChatModelOptionsFactory(chat_model="gpt-3.5-turbo", model_type="openai")
+    new_chat_model = ChatModelOptionsFactory(chat_model="gpt-4o", model_type="openai")
+    UserConversationProcessorConfigFactory(user=default_user, setting=old_chat_model)
+    # Render config page to cache the user's settings shown on it
+    response = client.get("/config", headers=AUTH_HEADERS)
+    assert f'<option value="{old_chat_model.id}" selected>' in response.text
 
     # Act
-    response = client.get(f"/api/search?q={user_query}&n=1&t=org&r=true&max_distance=0.22", headers=headers)
+    update_response = client.post(
+        "/api/config/data/conversation/model", params={"id": new_chat_model.id}, headers=AUTH_HEADERS
+    )
+    response = client.get("/config", headers=AUTH_HEADERS)
 
     # Assert
+    assert update_response.status_code == 200
     assert response.status_code == 200
-
-    assert len(response.json()) == 1, "Expected only 1 result"
-    search_result = response.json()[0]["entry"]
-    assert "git clone https://github.com/khoj-ai/khoj" in search_result, "Expected 'git clone' in search result"
+    assert f'<option value="{new_chat_model.id}" selected>' in response.text
 
 
 # ----------------------------------------------------------------------------------------------------
 @pytest.mark.django_db(transaction=True)
-def test_notes_search_no_results(client, search_config: SearchConfig, sample_org_data, default_user: KhojUser):
+def test_notes_search(client, search_config: SearchConfig):
     # Arrange
-    headers = {"Authorization": "Bearer kk-secret"}
-    text_search.setup(OrgToEntries, sample_org_data, regenerate=False, user=default_user)
-    user_query = quote("How to find my goat?")
+    user_query = "How to git install application?"
 
     # Act
-    response = client.get(f"/api/search?q={user_query}&n=1&t=org&r=true&max_distance=0.22", headers=headers)
-
-    # Assert
-    assert response.status_code == 200
-    assert response.json() == [], "Expected no results"
-
-
-# ----------------------------------------------------------------------------------------------------
-@pytest.mark.django_db(transaction=True)
-def test_notes_search_with_only_filters(
-    client, content_config: ContentConfig, search_config: SearchConfig, sample_org_data, default_user: KhojUser
-):
-    # Arrange
-    headers = {"Authorization": "Bearer kk-secret"}
-    text_search.setup(
-        OrgToEntries,
-        sample_org_data,
-        regenerate=False,
-        user=default_user,
+    response = client.get(
+        SEARCH_URL,
+        params={"q": user_query, "n": 1, "t": "org", "r": "true", "max_distance": 0.22},
+        headers=AUTH_HEADERS,
     )
-    user_query = quote('+"Emacs" file:"*.org"')
-
-    # Act
-    response = client.get(f"/api/search?q={user_query}&n=1&t=org", headers=headers)
 
     # Assert
     assert response.status_code == 200
-    # assert actual_data contains word "Emacs"
+
+    assert len(response.json()) == 1, "Expected only 1 result"
     search_result = response.json()[0]["entry"]
-    assert "Emacs" in search_result
+    assert "git clone https://github.com/khoj-ai/khoj" in search_result, "Expected 'git clone' in search result"
 
 
 # ----------------------------------------------------------------------------------------------------
 @pytest.mark.django_db(transaction=True)
-def test_notes_search_with_include_filter(client, sample_org_data, default_user: KhojUser):
+def test_notes_search_no_results(client, search_config: SearchConfig):
     # Arrange
-    headers = {"Authorization": "Bearer kk-secret"}
-    text_search.setup(OrgToEntries, sample_org_data, regenerate=False, user=default_user)
-    user_query = quote('How to git install application? +"Emacs"')
+    user_query = "How to find my goat?"
 
     # Act
-    response = client.get(f"/api/search?q={user_query}&n=1&t=org", headers=headers)
+    response = client.get(
+        SEARCH_URL,
+        params={"q": user_query, "n": 1, "t": "org", "r": "true", "max_distance": 0.22},
+        headers=AUTH_HEADERS,
+    )
 
     # Assert
     assert response.status_code == 200
-    # assert actual_data contains word "Emacs"
-    search_result = response.json()[0]["entry"]
-    assert "emacs" in search_result
+    assert response.json() == [], "Expected no results"
 
 
 # ----------------------------------------------------------------------------------------------------
 @pytest.mark.django_db(transaction=True)
-def test_notes_search_with_exclude_filter(client, sample_org_data, default_user: KhojUser):
-    # Arrange
-    headers = {"Authorization": "Bearer kk-secret"}
-    text_search.setup(
-        OrgToEntries,
-        sample_org_data,
-        regenerate=False,
-        user=default_user,
-    )
-    user_query = quote('How to git install application? -"clone"')
-
+@pytest.mark.parametrize(
+    "user_query, word, expected_in_result",
+    [
+        ('+"Emacs" file:"*.org"', "Emacs", True),  # only filters
+        ('How to git install application? +"Emacs"', "emacs", True),  # include filter
+        ('How to git install application? -"clone"', "clone", False),  # exclude filter
+    ],
+)
+def test_notes_search_with_filters(client, user_query: str, word: str, expected_in_result: bool):
     # Act
-    response = client.get(f"/api/search?q={user_query}&n=1&t=org", headers=headers)
+    response = client.get(SEARCH_URL, params={"q": user_query, "n": 1, "t": "org"}, headers=AUTH_HEADERS)
 
     # Assert
     assert response.status_code == 200
-    # assert actual_data does not contains word "clone"
+    # assert actual_data contains or does not contain filter word as expected
     search_result = response.json()[0]["entry"]
-    assert "clone" not in search_result
+    assert (word in search_result) == expected_in_result
 
 
 # ----------------------------------------------------------------------------------------------------
 @pytest.mark.django_db(transaction=True)
-def test_notes_search_requires_parent_context(
-    client, search_config: SearchConfig, sample_org_data, default_user: KhojUser
-):
+def test_notes_search_requires_parent_context(client, search_config: SearchConfig):
     # Arrange
-    headers = {"Authorization": "Bearer kk-secret"}
-    text_search.setup(OrgToEntries, sample_org_data, regenerate=False, user=default_user)
-    user_query = quote("Install Khoj on Emacs")
+    user_query = "Install Khoj on Emacs"
 
     # Act
-    response = client.get(f"/api/search?q={user_query}&n=1&t=org&r=true&max_distance=0.22", headers=headers)
+    response = client.get(
+        SEARCH_URL,
+        params={"q": user_query, "n": 1, "t": "org", "r": "true", "max_distance": 0.22},
+        headers=AUTH_HEADERS,
+    )
 
     # Assert
     assert response.status_code == 200
@@ -419,15 +406,14 @@ def test_notes_search_requires_parent_context(
 
 
 # ----------------------------------------------------------------------------------------------------
-@pytest.mark.django_db(transaction=True)
-def test_different_user_data_not_accessed(client, sample_org_data, default_user: KhojUser):
+@pytest.mark.django_db
+def test_different_user_data_not_accessed(client):
     # Arrange
     headers = {"Authorization": "Bearer kk-token"}  # Token for default_user2
-    text_search.setup(OrgToEntries, sample_org_data, regenerate=False, user=default_user)
-    user_query = quote("How to git install application?")
+    user_query = "How to git install application?"
 
     # Act
-    response = client.get(f"/api/search?q={user_query}&n=1&t=org", headers=headers)
+    response = client.get(SEARCH_URL, params={"q": user_query, "n": 1, "t": "org"}, headers=headers)
 
     # Assert
     assert response.status_code == 403
@@ -441,10 +427,10 @@ def test_user_no_data_returns_empty(client, sample_org_data, api_user3: KhojApiU
     # Arrange
     token = api_user3.token
     headers = {"Authorization": "Bearer " + token}
-    user_query = quote("How to git install application?")
+    user_query = "How to git install application?"
 
     # Act
-    response = client.get(f"/api/search?q={user_query}&n=1&t=org", headers=headers)
+    response = client.get(SEARCH_URL, params={"q": user_query, "n": 1, "t": "org"}, headers=headers)
 
     # Assert
     assert response.status_code == 200
@@ -468,8 +454,9 @@ def test_chat_with_unauthenticated_user(chat_client_with_auth, api_user2: KhojAp
     assert no_auth_response.status_code == 403
 
 
+@lru_cache(maxsize=None)
 def get_sample_files_data():
-    return [
+    return (
         ("files", ("path/to/filename.org", "* practicing piano", "text/org")),
         ("files", ("path/to/filename1.org", "** top 3 reasons why I moved to SF", "text/org")),
         ("files", ("path/to/filename2.org", "* how to build a search engine", "text/org")),
@@ -485,7 +472,14 @@ def get_sample_files_data():
             ("path/to/filename1.md", "## Studying anthropological records from the Fatimid caliphate", "text/markdown"),
         ),
         ("files", ("path/to/filename2.md", "**Understanding science through the lens of art**", "text/markdown")),
-    ]
+    )
+
+
+@lru_cache(maxsize=None)
+def get_sample_files_multipart() -> Tuple[bytes, str]:
+    "Encode sample files into a multipart form body once. Return the body with its content type header"
+    request = httpx.Request("POST", "http://testserver", files=get_sample_files_data())
+    return request.read(), request.headers["Content-Type"]
 
 
 def get_big_size_sample_files_data():
@@ -0,0 +1,41 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import schedule
+
+from khoj.configure import run_pending_scheduled_jobs, running_scheduled_jobs
+
+
+# ----------------------------------------------------------------------------------------------------
+def test_running_scheduled_job_not_started_again():
+    # Arrange
+    scheduler = schedule.Scheduler()
+    job_started, finish_job = threading.Event(), threading.Event()
+    job_runs = []
+
+    def slow_job():
+        job_runs.append(datetime.now())
+        job_started.set()
+        finish_job.wait(timeout=10)
+
+    job = scheduler.every(10).minutes.do(slow_job)
+    job.next_run = datetime.now() - timedelta(minutes=1)
+    run_pending_scheduled_jobs(scheduler)
+    assert job_started.wait(timeout=10)
+
+    # Act
+    # Job is still due to run, as it is only rescheduled once its current run completes
+    run_pending_scheduled_jobs(scheduler)
+
+    # Assert
+    assert len(job_runs) == 1
+    assert job in running_scheduled_jobs
+
+    # Job is released to run again once it completes
+    finish_job.set()
+    for _ in range(100):
+        if job not in running_scheduled_jobs:
+            break
+        time.sleep(0.1)
+    assert job not in running_scheduled_jobs
@@ -59,6 +59,33 @@ def test_lru_cache():
     assert cache == {"b": 2, "d": 4}
 
 
+def test_ttl_cache(monkeypatch):
+    # Arrange
+    now = 1000.0
+    monkeypatch.setattr(helpers, "monotonic", lambda: now)
+    cache = helpers.TTLCache(capacity=2, ttl=30)
+    cache["a"] = 1
+
+    # Test item retrieved before it expires
+    now += 29
+    assert cache["a"] == 1
+    assert "a" in cache
+
+    # Test item evicted once it expires
+    now += 1
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert len(cache) == 0
+
+
+def test_batcher():
+    # Test iterable split into chunks of max size, with last chunk holding the remainder
+    assert list(helpers.batcher(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+    # Test empty iterable yields no chunks
+    assert list(helpers.batcher([], 2)) == []
+
+
 @pytest.mark.skip(reason="Memory leak exists on GPU, MPS devices")
 def test_encode_docs_memory_leak():
     # Arrange